@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the translate-table text normalizer against the old regex cleaner.
+
+The old clean_text lower-cased the text and ran two regex substitutions,
+deleting everything outside [a-zA-Z\\s]. The new normalizer must be at least
+as fast on ASCII messages while also handling Unicode text.
+
+    python benchmark_normalizer.py --repeat 20
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'ml_service'))
+
+from text_normalizer import normalize_text  # noqa: E402
+
+ASCII_MESSAGES = [
+    "Win free money now! Click here!",
+    "Hello, how are you doing today?",
+    "Congratulations! You won a $1000 prize!",
+    "Meeting at 3 PM tomorrow in conference room",
+    "URGENT: Your account will be suspended",
+    "Thanks for your help with the project",
+    "Free lottery ticket! Claim now!",
+    "What time should we meet for lunch?",
+]
+
+UNICODE_MESSAGES = [
+    "Wïn FRÉE mönеy nоw! ＣＬＩＣＫ ｈｅｒｅ!",
+    "fr​ee c‍ash — lіmited tіme оffer",
+    "Grüße aus München, bis später!",
+    "Hola, ¿cómo estás? Nos vemos mañana.",
+    "ሰላም ለዓለም, እንዴት ነህ?",
+    "Привет, как дела? Встреча завтра.",
+    "𝐅𝐑𝐄𝐄 𝐌𝐎𝐍𝐄𝐘 🎉🎉 claim your prize",
+    "你好，明天见！",
+]
+
+
+def legacy_clean_text(text):
+    """The ASCII-only cleaner this normalizer replaced"""
+    text = str(text).lower()
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def measure(func, corpus, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            func(text)
+        best = min(best, time.perf_counter() - start)
+    chars = sum(len(text) for text in corpus)
+    return chars / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10, help='timing rounds, best is reported (default: 10)')
+    parser.add_argument('--copies', type=int, default=5000, help='copies of each sample message (default: 5000)')
+    args = parser.parse_args()
+
+    short_ascii = ASCII_MESSAGES * args.copies
+    long_ascii = [' '.join(ASCII_MESSAGES * 50)] * (args.copies // 50 or 1)
+    short_unicode = UNICODE_MESSAGES * args.copies
+
+    print("🚀 Normalizer throughput (million characters per second, higher is better)\n")
+    print(f"{'corpus':<16}{'legacy regex':>14}{'translate':>12}{'speedup':>10}")
+
+    ok = True
+    for name, corpus in (('ascii short', short_ascii), ('ascii long', long_ascii), ('unicode short', short_unicode)):
+        legacy = measure(legacy_clean_text, corpus, args.repeat)
+        current = measure(normalize_text, corpus, args.repeat)
+        print(f"{name:<16}{legacy:>14.1f}{current:>12.1f}{current / legacy:>9.2f}x")
+        if name.startswith('ascii') and current < legacy:
+            ok = False
+
+    print("\nSample output:")
+    for text in UNICODE_MESSAGES[:3]:
+        print(f"  {legacy_clean_text(text)!r:<40} -> {normalize_text(text)!r}")
+
+    if not ok:
+        print("\n❌ Normalizer is slower than the legacy ASCII path")
+        sys.exit(1)
+    print("\n✅ Normalizer is at least as fast as the legacy ASCII path")
+
+
+if __name__ == '__main__':
+    main()
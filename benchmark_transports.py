@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark Django -> ML service transports: in-process, Unix socket, TCP and TLS.
+
+Starts the ML service with uvicorn for each network transport and times
+sequential /predict calls through the same transport classes Django uses.
+
+    python benchmark_transports.py --requests 2000
+    python benchmark_transports.py --certfile cert.pem --keyfile key.pem   # include TLS
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import urllib3
+
+ROOT = Path(__file__).resolve().parent
+ML_SERVICE_DIR = ROOT / 'ml_service'
+sys.path.insert(0, str(ROOT / 'django_web'))
+
+from spam_app.services.transports import HTTPTransport, InProcessTransport, UnixSocketTransport  # noqa: E402
+
+SAMPLE_TEXT = "Congratulations! You won a $1000 prize! Click here to claim now."
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(extra_args):
+    """Start uvicorn serving ml_service/app.py with the given bind arguments"""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--log-level', 'warning', *extra_args],
+        cwd=ML_SERVICE_DIR,
+    )
+
+
+def wait_until_healthy(transport, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if transport.health_check():
+                return
+        except Exception:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"ML service did not come up on {transport.address}")
+
+
+def run(transport, count, warmup=50):
+    for _ in range(warmup):
+        transport.predict(SAMPLE_TEXT)
+
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        transport.predict(SAMPLE_TEXT)
+        timings.append((time.perf_counter() - start) * 1e6)
+
+    timings.sort()
+    return {
+        'mean': statistics.fmean(timings),
+        'p50': timings[len(timings) // 2],
+        'p99': timings[int(len(timings) * 0.99) - 1],
+    }
+
+
+def report(name, result):
+    print(f"{name:<12} mean {result['mean']:>9.1f} us   p50 {result['p50']:>9.1f} us   p99 {result['p99']:>9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000, help='requests per transport (default: 1000)')
+    parser.add_argument('--certfile', help='TLS certificate; enables the TLS benchmark')
+    parser.add_argument('--keyfile', help='TLS private key for --certfile')
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmarking {args.requests} sequential predictions per transport\n")
+
+    report('inprocess', run(InProcessTransport(ML_SERVICE_DIR), args.requests))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, 'ml.sock')
+        server = start_server(['--uds', socket_path])
+        try:
+            transport = UnixSocketTransport(socket_path)
+            wait_until_healthy(transport)
+            report('unix', run(transport, args.requests))
+        finally:
+            server.terminate()
+            server.wait()
+
+    port = free_port()
+    server = start_server(['--host', '127.0.0.1', '--port', str(port)])
+    try:
+        transport = HTTPTransport(f"http://127.0.0.1:{port}")
+        wait_until_healthy(transport)
+        report('tcp', run(transport, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+
+    if not (args.certfile and args.keyfile):
+        print("\nSkipping TLS (pass --certfile and --keyfile to include it)")
+        return
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    port = free_port()
+    server = start_server([
+        '--host', '127.0.0.1', '--port', str(port),
+        '--ssl-certfile', args.certfile, '--ssl-keyfile', args.keyfile,
+    ])
+    try:
+        transport = HTTPTransport(f"https://127.0.0.1:{port}")
+        # Self-signed benchmark certificates; ignore CA bundles from the environment
+        transport.session.trust_env = False
+        transport.session.verify = False
+        wait_until_healthy(transport)
+        report('tls', run(transport, args.requests))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class SpamAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'spam_app'
\ No newline at end of file
+    name = 'spam_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
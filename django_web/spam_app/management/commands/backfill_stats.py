@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from spam_app.models import Prediction
+from spam_app.services.caching import invalidate_predictions
+from spam_app.services.stats import accumulate, new_counts, replace_rollups
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the rollups from scratch.
+
+    Predictions are read in short keyset-paginated queries and folded into
+    in-memory counts (one entry per bucket and confidence bin, so memory
+    does not grow with the number of predictions). The new counts are then
+    swapped in with a single short transaction, so the web workers are
+    never blocked behind the rebuild. Predictions written during the scan
+    are read again by the swap, since their signal updates went to the
+    rows being replaced. A prediction deleted during the scan (or saved
+    just as the swap runs) may still be miscounted; re-run the command if
+    exact numbers matter.
+    """
+    help = 'Rebuild the hourly and daily prediction rollups from existing predictions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of predictions read per batch (default: 5000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        counts = new_counts()
+        last_id = 0
+        processed = 0
+
+        while True:
+            # Keyset pagination keeps each batch O(batch_size) in memory,
+            # and each batch is its own short read
+            rows = list(
+                Prediction.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'created_at', 'is_spam', 'confidence')[:batch_size]
+            )
+            if not rows:
+                break
+
+            for _, created_at, is_spam, confidence in rows:
+                accumulate(counts, created_at, is_spam, confidence)
+
+            last_id = rows[-1][0]
+            processed += len(rows)
+            self.stdout.write(f"Processed {processed} predictions...")
+
+        with transaction.atomic():
+            catch_up = Prediction.objects.filter(id__gt=last_id).values_list('created_at', 'is_spam', 'confidence')
+            for created_at, is_spam, confidence in catch_up:
+                accumulate(counts, created_at, is_spam, confidence)
+                processed += 1
+            replace_rollups(counts, batch_size=batch_size)
+        invalidate_predictions()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups from {processed} predictions"))
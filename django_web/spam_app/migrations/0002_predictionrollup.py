@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spam_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PredictionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('confidence_bin', models.PositiveSmallIntegerField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('spam_count', models.PositiveIntegerField(default=0)),
+                ('confidence_sum', models.FloatField(default=0.0)),
+            ],
+            options={
+                'ordering': ['-bucket_start', 'confidence_bin'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='predictionrollup',
+            constraint=models.UniqueConstraint(fields=('period', 'bucket_start', 'confidence_bin'), name='unique_rollup_bucket'),
+        ),
+    ]
@@ -11,4 +11,33 @@ class Prediction(models.Model):
         return f"{self.text[:50]} - {self.prediction} ({(self.confidence * 100):.1f}%)"
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+
+class PredictionRollup(models.Model):
+    """Pre-aggregated prediction counters for one time bucket and confidence bin"""
+    PERIOD_HOUR = 'hour'
+    PERIOD_DAY = 'day'
+    PERIOD_CHOICES = [
+        (PERIOD_HOUR, 'Hour'),
+        (PERIOD_DAY, 'Day'),
+    ]
+
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    confidence_bin = models.PositiveSmallIntegerField()  # 0-9, tenths of confidence
+    total = models.PositiveIntegerField(default=0)
+    spam_count = models.PositiveIntegerField(default=0)
+    confidence_sum = models.FloatField(default=0.0)
+
+    def __str__(self):
+        return f"{self.period} {self.bucket_start:%Y-%m-%d %H:%M} bin {self.confidence_bin}: {self.total}"
+
+    class Meta:
+        ordering = ['-bucket_start', 'confidence_bin']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'bucket_start', 'confidence_bin'],
+                name='unique_rollup_bucket',
+            ),
+        ]
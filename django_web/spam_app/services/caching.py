@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Max, Sum
+
+from ..models import Prediction, PredictionRollup
+
+VERSION_KEY = 'spam_app:predictions:version'
+STATUS_KEY = 'spam_app:ml_service:status'
+RECENT_FRAGMENT = 'recent_predictions'
+
+
+def predictions_version():
+    """
+    Token that changes whenever predictions are added or deleted.
+
+    Derived from the data (newest id and the daily rollup total), so it is
+    the same in every worker and after the cached copy expires. Cached for
+    PREDICTIONS_CACHE_TTL seconds.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        latest_id = Prediction.objects.aggregate(latest=Max('id'))['latest'] or 0
+        total = PredictionRollup.objects.filter(
+            period=PredictionRollup.PERIOD_DAY
+        ).aggregate(total=Sum('total'))['total'] or 0
+        version = f"{latest_id}.{total}"
+        cache.set(VERSION_KEY, version, settings.PREDICTIONS_CACHE_TTL)
+    return version
+
+
+def invalidate_predictions():
+    """Forget everything derived from predictions (writes, deletes, rollup rebuilds)"""
+    cache.delete_many([VERSION_KEY, make_template_fragment_key(RECENT_FRAGMENT)])
+
+
+def get_service_status(ml_client):
+    """ML service health, cached for STATUS_CACHE_TTL seconds"""
+    status = cache.get(STATUS_KEY)
+    if status is None:
+        status = bool(ml_client.health_check())
+        cache.set(STATUS_KEY, status, settings.STATUS_CACHE_TTL)
+    return status
@@ -1,54 +1,72 @@
-import requests
 from django.conf import settings
 import logging
 import os
 
+from .transports import HTTPTransport, InProcessTransport, TransportError, UnixSocketTransport
+
 logger = logging.getLogger(__name__)
 
 class MLServiceClient:
-    def __init__(self):
-        # Try to get ML service URL from different environment variables
-        if hasattr(settings, 'ML_SERVICE_URL'):
-            self.base_url = settings.ML_SERVICE_URL
+    def __init__(self, transport=None):
+        self.transport = transport or self._build_transport()
+        self.base_url = self.transport.address
+        logger.info(f"ML Service Client initialized with {self.transport.name} transport: {self.base_url}")
+
+    @staticmethod
+    def _resolve_url():
+        """Work out the HTTP base URL from settings or environment"""
+        if getattr(settings, 'ML_SERVICE_URL', None):
+            base_url = settings.ML_SERVICE_URL
         elif os.environ.get('ML_SERVICE_HOST'):
-            # Render deployment - construct URL from host and port
+            # Construct URL from host and port; only use TLS when asked to,
+            # co-located services talk plain HTTP
             host = os.environ.get('ML_SERVICE_HOST')
-            port = os.environ.get('ML_SERVICE_PORT', '10000')
-            self.base_url = f"https://{host}"  # Render uses HTTPS
+            port = os.environ.get('ML_SERVICE_PORT')
+            scheme = os.environ.get('ML_SERVICE_SCHEME', 'http')
+            base_url = f"{scheme}://{host}:{port}" if port else f"{scheme}://{host}"
         else:
             # Local development default
-            self.base_url = 'http://localhost:8001'
-        
+            base_url = 'http://localhost:8001'
+
         # Ensure no trailing slash
-        self.base_url = self.base_url.rstrip('/')
-        logger.info(f"ML Service Client initialized with URL: {self.base_url}")
-    
+        return base_url.rstrip('/')
+
+    def _build_transport(self):
+        transport = getattr(settings, 'ML_SERVICE_TRANSPORT', 'http')
+
+        if transport == 'inprocess':
+            return InProcessTransport(getattr(settings, 'ML_SERVICE_DIR', None))
+        if transport == 'unix':
+            return UnixSocketTransport(settings.ML_SERVICE_SOCKET)
+        if transport != 'http':
+            logger.warning(f"Unknown ML_SERVICE_TRANSPORT '{transport}', falling back to http")
+        return HTTPTransport(self._resolve_url())
+
     def predict(self, text):
         """Send text to ML service for spam prediction"""
+        return self._call(self.transport.predict, text)
+
+    def predict_document(self, text, early_exit=False):
+        """Send a long document to ML service for chunked spam prediction"""
+        return self._call(self.transport.predict_document, text, early_exit=early_exit)
+
+    def _call(self, method, *args, **kwargs):
         try:
-            url = f"{self.base_url}/predict"
-            logger.info(f"Sending request to: {url}")
-            
-            response = requests.post(
-                url,
-                json={"text": text},
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return method(*args, **kwargs)
+        except TransportError as e:
             logger.error(f"ML Service error: {e} - URL: {self.base_url}")
-            return {"error": "Spam detection service is currently unavailable"}
-    
+            error = {"error": "Spam detection service is currently unavailable"}
+            if e.retry_after is not None:
+                error["retry_after"] = e.retry_after
+            return error
+
     def health_check(self):
         """Check if ML service is healthy"""
         try:
-            url = f"{self.base_url}/health"
-            response = requests.get(url, timeout=10)
-            return response.status_code == 200
+            return self.transport.health_check()
         except Exception as e:
             logger.error(f"ML Service health check failed: {e}")
             return False
 
 # Create a singleton instance
-ml_client = MLServiceClient()
\ No newline at end of file
+ml_client = MLServiceClient()
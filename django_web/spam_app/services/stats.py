@@ -0,0 +1,162 @@
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import PredictionRollup
+
+CONFIDENCE_BINS = 10
+PERIODS = {
+    PredictionRollup.PERIOD_HOUR: timedelta(hours=1),
+    PredictionRollup.PERIOD_DAY: timedelta(days=1),
+}
+
+
+def bucket_start(moment, period):
+    """Truncate a datetime to the start of its hour or day bucket (UTC)"""
+    moment = timezone.localtime(moment, dt_timezone.utc)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    if period == PredictionRollup.PERIOD_DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def confidence_bin(confidence):
+    """Map a confidence in [0, 1] to a histogram bin index"""
+    return min(max(int(confidence * CONFIDENCE_BINS), 0), CONFIDENCE_BINS - 1)
+
+
+def _increment(period, start, bin_index, total, spam_count, confidence_sum):
+    """Add counts to a single rollup row, creating it on first use"""
+    key = dict(period=period, bucket_start=start, confidence_bin=bin_index)
+    changes = dict(
+        total=F('total') + total,
+        spam_count=F('spam_count') + spam_count,
+        confidence_sum=F('confidence_sum') + confidence_sum,
+    )
+    if PredictionRollup.objects.filter(**key).update(**changes):
+        return
+    if total <= 0:
+        # Nothing recorded for this bucket yet, so nothing to subtract
+        return
+    try:
+        with transaction.atomic():
+            PredictionRollup.objects.create(
+                total=total, spam_count=spam_count, confidence_sum=confidence_sum, **key
+            )
+    except IntegrityError:
+        # Another writer created the row first - add on top of theirs
+        PredictionRollup.objects.filter(**key).update(**changes)
+
+
+def apply_counts(counts):
+    """Apply aggregated counts keyed by (period, bucket_start, confidence_bin)"""
+    with transaction.atomic():
+        for (period, start, bin_index), (total, spam_count, confidence_sum) in counts.items():
+            _increment(period, start, bin_index, total, spam_count, confidence_sum)
+
+
+def replace_rollups(counts, batch_size=1000):
+    """Swap the whole rollup table for the given counts in one short transaction"""
+    rows = [
+        PredictionRollup(
+            period=period, bucket_start=start, confidence_bin=bin_index,
+            total=total, spam_count=spam_count, confidence_sum=confidence_sum,
+        )
+        for (period, start, bin_index), (total, spam_count, confidence_sum) in counts.items()
+        if total > 0
+    ]
+    with transaction.atomic():
+        PredictionRollup.objects.all().delete()
+        PredictionRollup.objects.bulk_create(rows, batch_size=batch_size)
+
+
+def accumulate(counts, created_at, is_spam, confidence, sign=1):
+    """Fold one prediction into an in-memory counts dict for every period (sign=-1 removes it)"""
+    bin_index = confidence_bin(confidence)
+    for period in PERIODS:
+        entry = counts[(period, bucket_start(created_at, period), bin_index)]
+        entry[0] += sign
+        entry[1] += sign * int(bool(is_spam))
+        entry[2] += sign * confidence
+
+
+def new_counts():
+    return defaultdict(lambda: [0, 0, 0.0])
+
+
+def record_prediction(prediction):
+    """Update the hourly and daily rollups for a newly written prediction"""
+    counts = new_counts()
+    accumulate(counts, prediction.created_at, prediction.is_spam, prediction.confidence)
+    apply_counts(counts)
+
+
+def remove_prediction(prediction):
+    """Subtract a deleted prediction from the hourly and daily rollups"""
+    counts = new_counts()
+    accumulate(counts, prediction.created_at, prediction.is_spam, prediction.confidence, sign=-1)
+    apply_counts(counts)
+
+
+def get_stats(period=PredictionRollup.PERIOD_HOUR, limit=24, now=None):
+    """
+    Return spam rate, volume and confidence distribution for the last
+    `limit` buckets of `period`, read only from the rollup table.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+
+    end = bucket_start(now or timezone.now(), period)
+    start = end - PERIODS[period] * (limit - 1)
+    rows = PredictionRollup.objects.filter(
+        period=period, bucket_start__gte=start, bucket_start__lte=end
+    ).values_list('bucket_start', 'confidence_bin', 'total', 'spam_count', 'confidence_sum')
+
+    buckets = {}
+    for moment, bin_index, total, spam_count, confidence_sum in rows:
+        bucket = buckets.setdefault(moment, {
+            'total': 0,
+            'spam': 0,
+            'confidence_sum': 0.0,
+            'confidence_histogram': [0] * CONFIDENCE_BINS,
+        })
+        bucket['total'] += total
+        bucket['spam'] += spam_count
+        bucket['confidence_sum'] += confidence_sum
+        bucket['confidence_histogram'][bin_index] += total
+
+    series = []
+    totals = {'total': 0, 'spam': 0, 'confidence_sum': 0.0}
+    for step in range(limit):
+        moment = start + PERIODS[period] * step
+        bucket = buckets.get(moment)
+        total = bucket['total'] if bucket else 0
+        spam = bucket['spam'] if bucket else 0
+        confidence_sum = bucket['confidence_sum'] if bucket else 0.0
+        series.append({
+            'bucket_start': moment.isoformat(),
+            'total': total,
+            'spam': spam,
+            'ham': total - spam,
+            'spam_rate': round(spam / total, 4) if total else 0.0,
+            'avg_confidence': round(confidence_sum / total, 4) if total else 0.0,
+            'confidence_histogram': bucket['confidence_histogram'] if bucket else [0] * CONFIDENCE_BINS,
+        })
+        totals['total'] += total
+        totals['spam'] += spam
+        totals['confidence_sum'] += confidence_sum
+
+    return {
+        'period': period,
+        'buckets': series,
+        'summary': {
+            'total': totals['total'],
+            'spam': totals['spam'],
+            'ham': totals['total'] - totals['spam'],
+            'spam_rate': round(totals['spam'] / totals['total'], 4) if totals['total'] else 0.0,
+            'avg_confidence': round(totals['confidence_sum'] / totals['total'], 4) if totals['total'] else 0.0,
+        },
+    }
@@ -0,0 +1,204 @@
+"""
+Transports used by the ML service client.
+
+- ``HTTPTransport``: HTTP(S) over TCP with a pooled keep-alive session.
+- ``UnixSocketTransport``: HTTP over a Unix domain socket served by uvicorn.
+- ``InProcessTransport``: imports the spam engine and calls it directly.
+
+This module has no Django dependency so it can be reused by benchmarks.
+"""
+import http.client
+import importlib
+import json
+import logging
+import socket
+import sys
+import threading
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class TransportError(Exception):
+    """Raised when the ML service cannot be reached or returns an error"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        # Seconds the ML service asked us to back off for when it shed load
+        self.retry_after = retry_after
+
+
+def _retry_after(headers):
+    try:
+        return int(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class HTTPTransport:
+    name = 'http'
+
+    def __init__(self, base_url, timeout=30, health_timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.health_timeout = health_timeout
+        # Reuse connections so TCP/TLS handshakes are not paid per request
+        self.session = requests.Session()
+
+    @property
+    def address(self):
+        return self.base_url
+
+    def predict(self, text):
+        try:
+            response = self.session.post(
+                f"{self.base_url}/predict",
+                json={"text": text},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.HTTPError as e:
+            raise TransportError(str(e), retry_after=_retry_after(e.response.headers)) from e
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+
+    def predict_document(self, text, early_exit=False):
+        try:
+            response = self.session.post(
+                f"{self.base_url}/predict/document",
+                params={"early_exit": "true" if early_exit else "false"},
+                data=text.encode('utf-8'),
+                headers={'Content-Type': 'text/plain; charset=utf-8'},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.HTTPError as e:
+            raise TransportError(str(e), retry_after=_retry_after(e.response.headers)) from e
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+
+    def health_check(self):
+        try:
+            response = self.session.get(f"{self.base_url}/health", timeout=self.health_timeout)
+            return response.status_code == 200
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class UnixSocketTransport:
+    name = 'unix'
+
+    def __init__(self, socket_path, timeout=30, health_timeout=10):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.health_timeout = health_timeout
+        # One keep-alive connection per thread; http.client is not thread-safe
+        self._local = threading.local()
+
+    @property
+    def address(self):
+        return f"unix://{self.socket_path}"
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method, path, body=None, timeout=None, content_type='application/json'):
+        headers = {'Content-Type': content_type} if body is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            reused = conn.sock is not None
+            conn.timeout = timeout or self.timeout
+            if reused:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+            except (ConnectionResetError, BrokenPipeError, http.client.RemoteDisconnected) as e:
+                self._discard(conn)
+                # The server closed an idle keep-alive connection before
+                # answering: safe to send once more on a fresh connection
+                if attempt or not reused:
+                    raise TransportError(str(e)) from e
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                # Timeouts and other failures are not retried; the request
+                # may already be running on the server
+                self._discard(conn)
+                raise TransportError(str(e)) from e
+
+            try:
+                return response.status, response.headers, response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self._discard(conn)
+                raise TransportError(str(e)) from e
+
+    def _discard(self, conn):
+        conn.close()
+        self._local.conn = None
+
+    def predict(self, text):
+        status, headers, body = self._request('POST', '/predict', json.dumps({"text": text}))
+        if status != 200:
+            raise TransportError(f"ML service returned HTTP {status}", retry_after=_retry_after(headers))
+        return json.loads(body)
+
+    def predict_document(self, text, early_exit=False):
+        path = f"/predict/document?early_exit={'true' if early_exit else 'false'}"
+        status, headers, body = self._request(
+            'POST', path, text.encode('utf-8'), content_type='text/plain; charset=utf-8'
+        )
+        if status != 200:
+            raise TransportError(f"ML service returned HTTP {status}", retry_after=_retry_after(headers))
+        return json.loads(body)
+
+    def health_check(self):
+        status, _, _ = self._request('GET', '/health', timeout=self.health_timeout)
+        return status == 200
+
+
+class InProcessTransport:
+    name = 'inprocess'
+
+    def __init__(self, service_dir=None, module='spam_engine'):
+        if service_dir and str(service_dir) not in sys.path:
+            sys.path.insert(0, str(service_dir))
+        self.engine = importlib.import_module(module)
+        self.module = module
+
+    @property
+    def address(self):
+        return f"inprocess://{self.module}"
+
+    def predict(self, text):
+        try:
+            return self.engine.predict(text)
+        except Exception as e:
+            raise TransportError(str(e)) from e
+
+    def predict_document(self, text, early_exit=False):
+        try:
+            return self.engine.predict_document(text, early_exit=early_exit)
+        except Exception as e:
+            raise TransportError(str(e)) from e
+
+    def health_check(self):
+        return True
@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+import logging
+
+from .models import Prediction
+from .services.caching import invalidate_predictions
+from .services.stats import record_prediction, remove_prediction
+
+logger = logging.getLogger(__name__)
+
+
+def _update_rollups(update, instance):
+    try:
+        update(instance)
+    except Exception as e:
+        logger.error(f"Failed to update prediction rollups: {e}")
+
+
+@receiver(post_save, sender=Prediction)
+def update_rollups(sender, instance, created, **kwargs):
+    """Keep the stats rollups in step with newly written predictions"""
+    if not created or kwargs.get('raw'):
+        return
+    # Only once committed, so a rolled-back prediction is never counted
+    transaction.on_commit(lambda: _update_rollups(record_prediction, instance))
+
+
+@receiver(post_delete, sender=Prediction)
+def subtract_from_rollups(sender, instance, **kwargs):
+    """Take deleted predictions back out of the stats rollups"""
+    transaction.on_commit(lambda: _update_rollups(remove_prediction, instance))
+
+
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+def expire_prediction_caches(sender, instance, **kwargs):
+    """Move ETags on and drop the cached recent-predictions fragment"""
+    # Queued after the rollup update above, so the version is recomputed
+    # from committed rows and rollups
+    transaction.on_commit(invalidate_predictions)
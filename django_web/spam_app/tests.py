@@ -1,3 +1,309 @@
-from django.test import TestCase
+import json
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .models import Prediction, PredictionRollup
+from .services.ml_client import MLServiceClient
+from .services.stats import get_stats
+from .services.transports import HTTPTransport, InProcessTransport, TransportError, UnixSocketTransport
+
+
+class PredictionRollupTests(TestCase):
+    def create(self, is_spam, confidence):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Prediction.objects.create(
+                text='test', prediction='spam' if is_spam else 'ham',
+                confidence=confidence, is_spam=is_spam,
+            )
+
+    def test_rollups_follow_writes_and_deletes(self):
+        spam = self.create(True, 0.95)
+        self.create(False, 0.6)
+
+        summary = get_stats('hour', 1)['summary']
+        self.assertEqual((summary['total'], summary['spam']), (2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            spam.delete()
+        summary = get_stats('day', 1)['summary']
+        self.assertEqual((summary['total'], summary['spam']), (1, 0))
+        self.assertEqual(summary['avg_confidence'], 0.6)
+
+    def test_rolled_back_prediction_is_not_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Prediction.objects.create(text='test', prediction='spam', confidence=0.9, is_spam=True)
+                    # Rollups are only touched once the prediction commits
+                    self.assertFalse(PredictionRollup.objects.exists())
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(get_stats('hour', 1)['summary']['total'], 0)
+
+    def test_backfill_matches_signal_rollups(self):
+        for i in range(7):
+            self.create(i % 2 == 0, i / 10)
+        expected = get_stats('hour', 1)
+
+        call_command('backfill_stats', batch_size=3, stdout=StringIO())
+
+        self.assertEqual(get_stats('hour', 1), expected)
+        self.assertEqual(PredictionRollup.objects.filter(period='hour').count(), 7)
+
+
+class CheckSpamTests(TestCase):
+    def test_early_exit_must_be_a_json_boolean(self):
+        response = self.client.post(
+            reverse('check_spam'),
+            json.dumps({'text': 'hello', 'mode': 'document', 'early_exit': 'false'}),
+            content_type='application/json',
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Prediction.objects.count(), 0)
+
+    def post_document(self, text):
+        return self.client.post(
+            reverse('check_spam'), json.dumps({'text': text, 'mode': 'document'}),
+            content_type='application/json', secure=True,
+        )
+
+    def test_document_limit_holds_for_escaped_characters(self):
+        result = {'prediction': 'ham', 'confidence': 0.9, 'is_spam': False}
+        # Astral characters are the worst case: a 12-byte JSON escape each
+        text = '\U0001F600' * settings.MAX_DOCUMENT_LENGTH
+        with mock.patch('spam_app.views.ml_client.predict_document', return_value=dict(result)):
+            self.assertEqual(self.post_document(text).status_code, 200)
+            self.assertEqual(self.post_document(text + 'x').status_code, 400)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_oversized_body_is_413(self):
+        response = self.post_document('x' * 2048)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('1024 bytes', response.json()['error'])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def get(self, path, **headers):
+        return self.client.get(path, secure=True, **headers)
+
+    def test_stats_errors_have_no_etag(self):
+        response = self.get(reverse('prediction_stats') + '?period=week')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+
+        response = self.get(reverse('prediction_stats') + '?period=day&limit=7')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_history_etag_is_derived_from_the_data(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            older = Prediction.objects.create(text='old', prediction='ham', confidence=0.9, is_spam=False)
+            Prediction.objects.create(text='new', prediction='spam', confidence=0.8, is_spam=True)
+        etag = self.get(reverse('prediction_history'))['ETag']
+        self.assertEqual(self.get(reverse('prediction_history'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Same data, same ETag: after the cached version expires and in
+        # workers that never had it cached
+        cache.clear()
+        self.assertEqual(self.get(reverse('prediction_history'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Deleting a row that is not the newest still moves it on
+        with self.captureOnCommitCallbacks(execute=True):
+            older.delete()
+        response = self.get(reverse('prediction_history'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        cache.clear()
+        self.assertEqual(self.get(reverse('prediction_history'))['ETag'], response['ETag'])
+
+    def test_history_ignores_if_modified_since(self):
+        # Deletes leave the newest created_at alone (or move it back), so
+        # only the ETag may validate the history
+        Prediction.objects.create(text='test', prediction='ham', confidence=0.9, is_spam=False)
+        since = 'Fri, 01 Jan 2100 00:00:00 GMT'
+        response = self.get(reverse('prediction_history'), HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_home_renders_cached_fragment(self):
+        Prediction.objects.create(text='cached text', prediction='ham', confidence=0.9, is_spam=False)
+        self.assertContains(self.get(reverse('home')), 'cached text')
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Minimal ML service whose behaviour is picked by server.mode"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append(self.path)
+        mode = self.server.mode
+
+        if mode == 'hang-up':
+            self.close_connection = True
+            return
+        if mode == 'slow':
+            time.sleep(0.5)
+        if mode == 'overloaded':
+            self._reply(503, b'{"detail": "overloaded"}', [('Retry-After', '7')])
+            return
+        if mode == 'truncated':
+            self.send_response(200)
+            self.send_header('Content-Length', '100')
+            self.end_headers()
+            self.wfile.write(b'{"predic')
+            self.close_connection = True
+            return
+
+        self._reply(200, b'{"prediction": "ham", "confidence": 0.9, "is_spam": false}')
+        # 'close-idle': answer, then drop the keep-alive connection like an
+        # idle timeout would, without telling the client
+        self.close_connection = mode == 'close-idle'
+
+    def _reply(self, status, body, headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # clients hanging up mid-response are part of the tests
+
+
+class UnixSocketTransportTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.socket_path = os.path.join(directory.name, 'ml.sock')
+
+        self.server = _StubServer(self.socket_path, _StubHandler)
+        self.server.mode = 'ok'
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.transport = UnixSocketTransport(self.socket_path, timeout=0.2)
+
+    def test_predict_reuses_connection(self):
+        self.assertFalse(self.transport.predict('hello')['is_spam'])
+        conn = self.transport._connection()
+        self.transport.predict('hello again')
+        self.assertIs(self.transport._connection(), conn)
+        self.assertEqual(self.server.requests, ['/predict', '/predict'])
+
+    def test_stale_keep_alive_connection_is_retried_once(self):
+        self.server.mode = 'close-idle'
+        self.transport.predict('hello')
+        time.sleep(0.05)  # let the server close its end
+
+        self.server.mode = 'ok'
+        self.assertEqual(self.transport.predict('hello again')['prediction'], 'ham')
+        self.assertEqual(self.server.requests, ['/predict', '/predict'])
+
+    def test_fresh_connection_failure_is_not_retried(self):
+        self.server.mode = 'hang-up'
+        with self.assertRaises(TransportError):
+            self.transport.predict('hello')
+        self.assertEqual(self.server.requests, ['/predict'])
+
+    def test_timeout_is_not_retried(self):
+        self.transport.predict('warm up the connection')
+        self.server.mode = 'slow'
+        with self.assertRaises(TransportError):
+            self.transport.predict('hello')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_partial_response_is_not_retried(self):
+        self.transport.predict('warm up the connection')
+        self.server.mode = 'truncated'
+        with self.assertRaises(TransportError):
+            self.transport.predict('hello')
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_retry_after_reaches_the_client(self):
+        self.server.mode = 'overloaded'
+        with self.assertRaises(TransportError) as raised:
+            self.transport.predict_document('hello', early_exit=True)
+        self.assertEqual(raised.exception.retry_after, 7)
+        self.assertEqual(self.server.requests, ['/predict/document?early_exit=true'])
+
+        with self.assertLogs('spam_app.services.ml_client', 'ERROR'):
+            result = MLServiceClient(transport=self.transport).predict('hello')
+        self.assertEqual(result['retry_after'], 7)
+        self.assertIn('error', result)
+
+
+class MLServiceClientTests(SimpleTestCase):
+    def client_for(self, **environ):
+        with mock.patch.dict(os.environ, environ, clear=False):
+            for name in {'ML_SERVICE_HOST', 'ML_SERVICE_PORT', 'ML_SERVICE_SCHEME'} - set(environ):
+                os.environ.pop(name, None)
+            return MLServiceClient()
+
+    @override_settings(ML_SERVICE_TRANSPORT='http', ML_SERVICE_URL='http://ml.internal:9000/')
+    def test_url_setting_wins(self):
+        self.assertEqual(self.client_for(ML_SERVICE_HOST='other').base_url, 'http://ml.internal:9000')
+
+    @override_settings(ML_SERVICE_TRANSPORT='http', ML_SERVICE_URL=None)
+    def test_url_from_host_defaults_to_plain_http(self):
+        self.assertEqual(self.client_for(ML_SERVICE_HOST='ml', ML_SERVICE_PORT='8001').base_url, 'http://ml:8001')
+        self.assertEqual(
+            self.client_for(ML_SERVICE_HOST='ml.example.com', ML_SERVICE_SCHEME='https').base_url,
+            'https://ml.example.com',
+        )
+        self.assertEqual(self.client_for().base_url, 'http://localhost:8001')
+
+    @override_settings(ML_SERVICE_TRANSPORT='carrier-pigeon', ML_SERVICE_URL=None)
+    def test_unknown_transport_falls_back_to_http(self):
+        with self.assertLogs('spam_app.services.ml_client', 'WARNING'):
+            client = self.client_for()
+        self.assertIsInstance(client.transport, HTTPTransport)
+
+    @override_settings(ML_SERVICE_TRANSPORT='unix', ML_SERVICE_SOCKET='/tmp/test-ml.sock')
+    def test_unix_transport(self):
+        client = self.client_for()
+        self.assertIsInstance(client.transport, UnixSocketTransport)
+        self.assertEqual(client.base_url, 'unix:///tmp/test-ml.sock')
+
+    @override_settings(ML_SERVICE_TRANSPORT='inprocess')
+    def test_inprocess_transport_scores_directly(self):
+        client = self.client_for()
+        self.assertIsInstance(client.transport, InProcessTransport)
+        self.assertTrue(client.health_check())
+        self.assertTrue(client.predict('Congratulations you won! Claim your prize now')['is_spam'])
+
+        result = client.predict_document('Hello, how are you? ' * 1000, early_exit=True)
+        self.assertEqual(result['prediction'], 'ham')
+        self.assertTrue(result['stopped_early'])
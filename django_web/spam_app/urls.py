@@ -6,4 +6,5 @@ urlpatterns = [
     path('api/check-spam/', views.check_spam, name='check_spam'),
     path('api/history/', views.prediction_history, name='prediction_history'),
     path('api/status/', views.service_status, name='service_status'),
+    path('api/stats/', views.prediction_stats, name='prediction_stats'),
 ]
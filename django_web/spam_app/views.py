@@ -1,7 +1,11 @@
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.utils import timezone
 from django.shortcuts import render
 from django.http import JsonResponse
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import condition, require_http_methods
 import json
 import logging
 
@@ -13,6 +17,8 @@ except ImportError:
     class DummyMLClient:
         def predict(self, text):
             return {"error": "ML client not configured"}
+        def predict_document(self, text, early_exit=False):
+            return {"error": "ML client not configured"}
         def health_check(self):
             return False
     ml_client = DummyMLClient()
@@ -32,20 +38,69 @@ except ImportError:
                 '__getitem__': lambda self, index: []
             })()
 
+try:
+    from .services.stats import get_stats
+except ImportError:
+    get_stats = None
+
+from .services.caching import get_service_status, predictions_version
+
 logger = logging.getLogger(__name__)
 
+# Conditional GET helpers - answered from the cache, without touching the
+# ML service or the predictions table when nothing has changed
+
+def _history_etag(request):
+    return f'"history-{predictions_version()}"'
+
+def _stats_params(request):
+    """Validated (period, limit) from the query string; ValueError if invalid"""
+    period = request.GET.get('period', 'hour')
+    default_limit = 24 if period == 'hour' else 30
+
+    try:
+        limit = int(request.GET.get('limit', default_limit))
+    except ValueError:
+        raise ValueError('limit must be an integer') from None
+
+    if period not in ('hour', 'day'):
+        raise ValueError("period must be 'hour' or 'day'")
+
+    if not 1 <= limit <= 168:
+        raise ValueError('limit must be between 1 and 168')
+
+    return period, limit
+
+def _stats_etag(request):
+    # Only successful responses get an ETag
+    if get_stats is None:
+        return None
+    try:
+        period, limit = _stats_params(request)
+    except ValueError:
+        return None
+    # The trend window also moves with the clock, so include the hour
+    return '"stats-{}-{}-{}-{}"'.format(
+        predictions_version(), period, limit, timezone.now().strftime('%Y%m%d%H'),
+    )
+
+def _status_etag(request):
+    return f'"status-{int(get_service_status(ml_client))}"'
+
 def home(request):
     """Render the main page"""
-    service_status = ml_client.health_check()
+    service_status = get_service_status(ml_client)
     
     try:
+        # Lazy queryset: only evaluated when the cached fragment has expired
         recent_predictions = Prediction.objects.all()[:5]
     except:
         recent_predictions = []
     
     return render(request, 'home.html', {
         'service_status': service_status,
-        'recent_predictions': recent_predictions
+        'recent_predictions': recent_predictions,
+        'predictions_cache_ttl': settings.PREDICTIONS_CACHE_TTL
     })
 
 @require_http_methods(["POST"])
@@ -59,19 +114,33 @@ def check_spam(request):
         if not text:
             return JsonResponse({'error': 'Text is required'}, status=400)
         
-        if len(text) > 1000:
-            return JsonResponse({'error': 'Text too long (max 1000 characters)'}, status=400)
+        # Long-document mode scores full email bodies in chunks on the ML side
+        document_mode = data.get('mode') == 'document'
+        max_length = settings.MAX_DOCUMENT_LENGTH if document_mode else 1000
+        
+        if len(text) > max_length:
+            return JsonResponse({'error': f'Text too long (max {max_length} characters)'}, status=400)
+        
+        early_exit = data.get('early_exit', False)
+        if not isinstance(early_exit, bool):
+            return JsonResponse({'error': 'early_exit must be true or false'}, status=400)
         
         # Call ML service
-        result = ml_client.predict(text)
+        if document_mode:
+            result = ml_client.predict_document(text, early_exit=early_exit)
+        else:
+            result = ml_client.predict(text)
         
         if 'error' in result:
-            return JsonResponse({'error': result['error']}, status=503)
+            response = JsonResponse({'error': result['error']}, status=503)
+            if result.get('retry_after') is not None:
+                response['Retry-After'] = str(result['retry_after'])
+            return response
         
         # Save to database if models are available
         try:
             prediction = Prediction.objects.create(
-                text=text,
+                text=text[:1000],  # documents are stored as a preview only
                 prediction=result['prediction'],
                 confidence=result['confidence'],
                 is_spam=result['is_spam']
@@ -84,11 +153,16 @@ def check_spam(request):
         
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except RequestDataTooBig:
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        return JsonResponse({'error': f'Request body too large (max {limit} bytes)'}, status=413)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return JsonResponse({'error': 'Internal server error'}, status=500)
 
 @require_http_methods(["GET"])
+@cache_control(no_cache=True)
+@condition(etag_func=_history_etag)
 def prediction_history(request):
     """Get prediction history"""
     try:
@@ -110,10 +184,27 @@ def prediction_history(request):
     return JsonResponse({'predictions': data})
 
 @require_http_methods(["GET"])
+@cache_control(max_age=settings.STATUS_CACHE_TTL)
+@condition(etag_func=_status_etag)
 def service_status(request):
     """Check ML service status"""
-    status = ml_client.health_check()
+    status = get_service_status(ml_client)
     return JsonResponse({
         'ml_service_status': 'online' if status else 'offline',
         'ml_service_url': getattr(ml_client, 'base_url', 'http://localhost:8001')
-    })
\ No newline at end of file
+    })
+
+@require_http_methods(["GET"])
+@cache_control(no_cache=True)
+@condition(etag_func=_stats_etag)
+def prediction_stats(request):
+    """Get spam rate, volume and confidence trends from the rollup tables"""
+    try:
+        period, limit = _stats_params(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if get_stats is None:
+        return JsonResponse({'error': 'Statistics are not available'}, status=503)
+
+    return JsonResponse(get_stats(period=period, limit=limit))
\ No newline at end of file
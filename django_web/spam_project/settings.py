@@ -86,6 +86,25 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Cache - used for the ML status payload, ETag versions and the recent
+# predictions fragment. Use a shared backend (e.g. file-based, Redis or
+# memcached) when running several workers so invalidation reaches them all.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'spam-detector'),
+    }
+}
+
+# Seconds the ML service health result is reused by home and /api/status/
+STATUS_CACHE_TTL = int(os.environ.get('STATUS_CACHE_TTL', 10))
+
+# Seconds the prediction version (used in ETags) and the recent predictions
+# fragment are cached. Writes only invalidate the cache of the process that
+# made them, so with a per-process cache this bounds how stale other workers
+# can be; with a shared backend it can be raised.
+PREDICTIONS_CACHE_TTL = int(os.environ.get('PREDICTIONS_CACHE_TTL', 10))
+
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -98,7 +117,18 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOW_ALL_ORIGINS = True
 
 # ML Service configuration
-ML_SERVICE_URL = os.environ.get('ML_SERVICE_URL', 'http://localhost:8001')
+# Transport: 'http' (TCP/TLS), 'unix' (Unix domain socket) or 'inprocess'
+# (import the spam engine directly - for single-box deployments)
+ML_SERVICE_TRANSPORT = os.environ.get('ML_SERVICE_TRANSPORT', 'http')
+ML_SERVICE_URL = os.environ.get('ML_SERVICE_URL')  # falls back to ML_SERVICE_HOST, then localhost:8001
+ML_SERVICE_SOCKET = os.environ.get('ML_SERVICE_SOCKET', '/tmp/spam-ml.sock')
+ML_SERVICE_DIR = os.environ.get('ML_SERVICE_DIR', str(BASE_DIR.parent / 'ml_service'))
+
+# Long-document mode (check-spam with "mode": "document") - full email bodies
+MAX_DOCUMENT_LENGTH = int(os.environ.get('MAX_DOCUMENT_LENGTH', 5 * 1024 * 1024))
+# The JSON request body may escape every character: 6 bytes for \uXXXX, 12
+# for an astral character's surrogate pair. Leave room for the envelope too.
+DATA_UPLOAD_MAX_MEMORY_SIZE = MAX_DOCUMENT_LENGTH * 12 + 64 * 1024
 
 # Security settings for production
 if not DEBUG:
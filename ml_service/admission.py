@@ -0,0 +1,168 @@
+"""
+Admission control and load shedding for the ML service.
+
+Requests beyond ``max_concurrency`` wait in a bounded priority queue.
+Interactive traffic is always woken before batch traffic, and batch
+traffic may only use part of the queue and at most ``batch_concurrency``
+slots, so slow document uploads can never take every slot away from
+interactive requests. Anything that cannot be admitted (queue full or
+queue-time deadline passed) is rejected immediately with 503 and
+``Retry-After`` instead of piling up behind the client timeout.
+"""
+import asyncio
+import json
+from collections import deque
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency=4, max_queue=64, batch_queue=None,
+                 queue_timeout=1.0, retry_after=1, batch_concurrency=None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.batch_queue = max_queue // 2 if batch_queue is None else batch_queue
+        # By default one slot is kept for interactive requests
+        self.batch_concurrency = (
+            max(max_concurrency - 1, 1) if batch_concurrency is None else batch_concurrency
+        )
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self.running = {priority: 0 for priority in PRIORITIES}
+        self._waiters = {priority: deque() for priority in PRIORITIES}
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.shed = {priority: 0 for priority in PRIORITIES}
+        self.timed_out = {priority: 0 for priority in PRIORITIES}
+
+    @property
+    def in_flight(self):
+        return sum(self.running.values())
+
+    @property
+    def queue_depth(self):
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _can_start(self, priority):
+        if self.in_flight >= self.max_concurrency:
+            return False
+        return priority == INTERACTIVE or self.running[BATCH] < self.batch_concurrency
+
+    async def acquire(self, priority):
+        # Batch requests also wait behind queued interactive ones
+        ahead = self._waiters[INTERACTIVE] if priority == INTERACTIVE else self.queue_depth
+        if self._can_start(priority) and not ahead:
+            self.running[priority] += 1
+            self.admitted[priority] += 1
+            return
+
+        limit = self.max_queue if priority == INTERACTIVE else self.batch_queue
+        if self.queue_depth >= limit:
+            self.shed[priority] += 1
+            raise Overloaded("queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        try:
+            # The slot is handed over by release(), so it is already counted
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._discard(priority, waiter)
+            if not (waiter.done() and not waiter.cancelled()):
+                self.timed_out[priority] += 1
+                raise Overloaded("queue timeout")
+            # Granted in the same loop tick as the deadline (wait_for on
+            # Python 3.12+ can still time out then): the slot is ours
+        except asyncio.CancelledError:
+            self._discard(priority, waiter)
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the client went away - pass the slot on
+                self.release(priority)
+            raise
+        self.admitted[priority] += 1
+
+    def release(self, priority):
+        self.running[priority] -= 1
+        # Hand freed capacity to waiters, interactive first
+        for candidate in PRIORITIES:
+            waiters = self._waiters[candidate]
+            while waiters and self._can_start(candidate):
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self.running[candidate] += 1
+                    waiter.set_result(None)
+
+    def _discard(self, priority, waiter):
+        try:
+            self._waiters[priority].remove(waiter)
+        except ValueError:
+            pass
+
+    def metrics(self):
+        return {
+            "in_flight": self.in_flight,
+            "running": dict(self.running),
+            "max_concurrency": self.max_concurrency,
+            "batch_concurrency": self.batch_concurrency,
+            "queue_depth": {priority: len(self._waiters[priority]) for priority in PRIORITIES},
+            "max_queue": self.max_queue,
+            "batch_queue": self.batch_queue,
+            "queue_timeout": self.queue_timeout,
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "timed_out": dict(self.timed_out),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an AdmissionController per request path.
+
+    Paths missing from ``priorities`` (health checks, metrics) bypass the
+    limiter entirely so they keep answering during overload.
+    """
+
+    def __init__(self, app, controller, priorities):
+        self.app = app
+        self.controller = controller
+        self.priorities = priorities
+
+    async def __call__(self, scope, receive, send):
+        priority = self.priorities.get(scope.get("path")) if scope["type"] == "http" else None
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(priority)
+        except Overloaded as e:
+            await self._reject(send, e.reason)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority)
+
+    async def _reject(self, send, reason):
+        body = json.dumps({"detail": f"Service overloaded ({reason}), retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.controller.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,7 +1,12 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import re
+from starlette.concurrency import run_in_threadpool
+import codecs
+import os
+
+from admission import BATCH, INTERACTIVE, AdmissionController, AdmissionMiddleware
+from spam_engine import DocumentScorer, detect_spam
 
 app = FastAPI(
     title="Spam Detection API",
@@ -9,6 +14,27 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Admission control - shed load quickly instead of queueing without bound.
+# Added before CORS so rejected requests still get CORS headers.
+admission = AdmissionController(
+    max_concurrency=int(os.environ.get("ML_MAX_CONCURRENCY", 4)),
+    max_queue=int(os.environ.get("ML_MAX_QUEUE", 64)),
+    queue_timeout=float(os.environ.get("ML_QUEUE_TIMEOUT", 1.0)),
+    retry_after=int(os.environ.get("ML_RETRY_AFTER", 1)),
+    # Defaults to all but one slot, keeping one for interactive /predict
+    batch_concurrency=int(os.environ.get("ML_BATCH_CONCURRENCY", 0)) or None,
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    priorities={
+        "/predict": INTERACTIVE,
+        "/predict/document": BATCH,
+        "/batch_predict": BATCH,
+        "/test": BATCH,
+    },
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -26,122 +52,17 @@ class PredictionResponse(BaseModel):
     confidence: float
     is_spam: bool
 
+class DocumentPredictionResponse(PredictionResponse):
+    chars_scanned: int
+    words: int
+    stopped_early: bool
+
 class HealthResponse(BaseModel):
     status: str
     service: str
     version: str
     model_type: str
 
-def clean_text(text):
-    """Basic text cleaning"""
-    text = str(text).lower()
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-def detect_spam(text):
-    """
-    Advanced rule-based spam detection
-    No machine learning dependencies - pure Python logic
-    """
-    if not text or not text.strip():
-        return False, 0.1
-    
-    cleaned_text = clean_text(text)
-    words = cleaned_text.split()
-    
-    if not words:
-        return False, 0.1
-    
-    # Comprehensive spam patterns
-    spam_patterns = [
-        # Financial spam
-        r'\b(win|won|winner|prize|reward|cash|money|free|bonus)\b',
-        r'\b(million|billion|dollar|euro|pound)\b',
-        r'\b(rich|wealth|fortune|lottery|jackpot)\b',
-        
-        # Urgency and pressure
-        r'\b(urgent|immediate|instant|limited|quick|fast)\b',
-        r'\b(act now|click here|buy now|order now)\b',
-        r'\b(discount|offer|deal|sale|clearance)\b',
-        
-        # Suspicious claims
-        r'\b(guarantee|guaranteed|promise|risk.free)\b',
-        r'\b(selected|chosen|lucky|exclusive|special)\b',
-        r'\b(100% free|no cost|no fee|no obligation)\b',
-        
-        # Technical spam
-        r'\b(account|password|verify|confirm|suspend)\b',
-        r'\b(click|link|website|url|http|www)\b',
-        
-        # Emotional manipulation
-        r'\b(congratulation|congrats|amazing|incredible)\b',
-        r'\b(opportunity|chance|offer|limited.time)\b'
-    ]
-    
-    # Count spam indicators
-    spam_score = 0
-    total_words = len(words)
-    
-    for pattern in spam_patterns:
-        matches = re.findall(pattern, cleaned_text)
-        spam_score += len(matches)
-    
-    # Calculate spam probability using sophisticated rules
-    spam_ratio = spam_score / max(total_words, 1)
-    
-    # Advanced scoring algorithm
-    if total_words < 3:
-        base_score = 0.1
-    elif total_words > 50:
-        base_score = 0.3  # Long messages are often legitimate
-    else:
-        base_score = 0.2
-    
-    # Adjust score based on spam indicators
-    if spam_score >= 4:
-        is_spam = True
-        confidence = min(0.85, base_score + (spam_ratio * 0.8))
-    elif spam_score >= 3:
-        is_spam = True
-        confidence = min(0.75, base_score + (spam_ratio * 0.7))
-    elif spam_score >= 2:
-        is_spam = spam_ratio > 0.25
-        confidence = min(0.65, base_score + (spam_ratio * 0.6))
-    elif spam_score >= 1:
-        is_spam = spam_ratio > 0.3
-        confidence = min(0.55, base_score + (spam_ratio * 0.5))
-    else:
-        is_spam = False
-        # Legitimate messages get higher confidence if they're reasonable length
-        confidence = max(0.6, 0.9 - (total_words / 200))
-    
-    # Special cases - override logic for obvious spam/ham
-    obvious_spam_phrases = [
-        'win free money', 'congratulations you won', 'you are selected',
-        'claim your prize', 'limited time offer', 'act now before'
-    ]
-    
-    obvious_ham_phrases = [
-        'hello how are you', 'meeting tomorrow', 'thanks for your',
-        'see you later', 'have a good day', 'what time is'
-    ]
-    
-    text_lower = cleaned_text.lower()
-    for phrase in obvious_spam_phrases:
-        if phrase in text_lower:
-            is_spam = True
-            confidence = max(confidence, 0.95)
-            break
-    
-    for phrase in obvious_ham_phrases:
-        if phrase in text_lower:
-            is_spam = False
-            confidence = max(confidence, 0.9)
-            break
-    
-    return is_spam, round(confidence, 3)
-
 @app.get("/", response_model=HealthResponse)
 async def root():
     return HealthResponse(
@@ -160,8 +81,17 @@ async def health_check():
         model_type="rule-based-advanced"
     )
 
+@app.get("/metrics")
+async def metrics():
+    """Admission control metrics: in-flight work, queue depth and shed requests"""
+    return admission.metrics()
+
+# Scoring is CPU-bound, so the scoring endpoints are plain functions (or hand
+# work to run_in_threadpool) - FastAPI runs them off the event loop, which keeps
+# /health responsive and lets admission control see the real in-flight work.
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(request: PredictionRequest):
+def predict(request: PredictionRequest):
     try:
         is_spam, confidence = detect_spam(request.text)
         
@@ -179,8 +109,36 @@ async def predict(request: PredictionRequest):
             is_spam=False
         )
 
+@app.post("/predict/document", response_model=DocumentPredictionResponse)
+async def predict_document(request: Request, early_exit: bool = False):
+    """
+    Long-document scoring: the raw request body (plain text or HTML, UTF-8)
+    is decoded and scored chunk by chunk as it streams in, so memory stays
+    bounded however large the document is. With early_exit=true reading
+    stops once the verdict can no longer change.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    scorer = DocumentScorer(early_exit=early_exit)
+
+    async for chunk in request.stream():
+        if await run_in_threadpool(scorer.feed, decoder.decode(chunk)):
+            scorer.stopped_early = True
+            break
+    else:
+        await run_in_threadpool(scorer.feed, decoder.decode(b"", final=True))
+
+    is_spam, confidence = await run_in_threadpool(scorer.result)
+    return DocumentPredictionResponse(
+        prediction="spam" if is_spam else "ham",
+        confidence=confidence,
+        is_spam=is_spam,
+        chars_scanned=scorer.chars_scanned,
+        words=scorer.total_words,
+        stopped_early=scorer.stopped_early
+    )
+
 @app.get("/batch_predict")
-async def batch_predict(texts: list[str] = None):
+def batch_predict(texts: list[str] = None):
     """Batch prediction endpoint"""
     if not texts:
         return {"predictions": []}
@@ -199,7 +157,7 @@ async def batch_predict(texts: list[str] = None):
 
 # Test endpoint to verify the detection logic
 @app.get("/test")
-async def test_endpoint():
+def test_endpoint():
     """Test various spam and ham examples"""
     test_cases = [
         "Win free money now! Click here!",
@@ -226,6 +184,10 @@ async def test_endpoint():
 
 if __name__ == "__main__":
     import uvicorn
-    import os
-    port = int(os.environ.get("PORT", 8001))
-    uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
\ No newline at end of file
+    socket_path = os.environ.get("ML_SERVICE_SOCKET")
+    if socket_path:
+        # Co-located deployments: serve over a Unix domain socket instead of TCP
+        uvicorn.run(app, uds=socket_path, log_level="info")
+    else:
+        port = int(os.environ.get("PORT", 8001))
+        uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""
+Memory-mapped blocklist of known-bad domains, URLs and phrases.
+
+The blocklist file holds a Bloom filter followed by the sorted 128-bit
+BLAKE2b digests of every entry. Lookups hash the key once; the Bloom
+filter rejects almost every clean key after a few bit probes, and the
+rare positives are confirmed exactly by binary search over the digests.
+The file is opened read-only with mmap, so all workers on a host share
+one copy through the page cache instead of holding a Python set each.
+
+Build or rebuild it offline with the CLI:
+
+    python blocklist.py build -o blocklist.bin --domains domains.txt --urls urls.txt --phrases phrases.txt
+    python blocklist.py check blocklist.bin "Claim your prize at http://bad.example.com/win"
+
+then point the service at it with ML_BLOCKLIST_PATH.
+"""
+import argparse
+import hashlib
+import heapq
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+from collections import deque
+from functools import lru_cache, partial
+
+from text_normalizer import MAX_TOKEN_LENGTH, normalize_text, normalize_word
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SPAMBLK1'
+HEADER = struct.Struct('<8sQQIIQ')  # magic, bloom bits, entries, hashes, max phrase words, reserved
+DIGEST_SIZE = 16
+# Digests sorted in memory at a time by build(); larger feeds are sorted in
+# runs spilled to temporary files and merged
+SORT_CHUNK = 1 << 18
+
+DOMAIN = 'd:'
+URL = 'u:'
+PHRASE = 'p:'
+PHRASE_START = 's:'  # first word of some phrase; lets most words skip n-gram checks
+
+_STRIP = '.,;:!?()[]{}<>"\'`*'
+_HOST = re.compile(r'^(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,63}$')
+
+
+def _digest(key):
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+
+def _bloom_positions(digest, num_bits, num_hashes):
+    # Kirsch-Mitzenmacher double hashing from the two halves of one digest
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:], 'little') | 1
+    for i in range(num_hashes):
+        yield (h1 + i * h2) % num_bits
+
+
+def normalize_domain(domain):
+    domain = domain.strip().strip(_STRIP).lower().rstrip('.')
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
+
+
+def normalize_url(url):
+    """Return (host, key) for a URL: scheme, www., fragment and trailing slash dropped"""
+    url = url.strip().strip(_STRIP)
+    lowered = url.lower()
+    if '://' in lowered:
+        url = url[lowered.index('://') + 3:]
+    host, sep, rest = url.partition('/')
+    host = normalize_domain(host.split('@')[-1].split(':')[0])
+    path = (sep + rest).split('#')[0].rstrip('/')
+    return host, host + path
+
+
+class Blocklist:
+    """Read-only view of a blocklist file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.num_bits, self.entries, self.num_hashes, self.max_phrase_words, _ = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a blocklist file")
+
+        self._bloom_offset = HEADER.size
+        self._digest_offset = self._bloom_offset + (self.num_bits + 7) // 8
+        # Common words repeat across messages; remember which start a phrase
+        self.is_phrase_start = lru_cache(maxsize=65536)(self._is_phrase_start)
+
+    def _is_phrase_start(self, word):
+        return PHRASE_START + word in self
+
+    def __contains__(self, key):
+        digest = _digest(key)
+        bloom = self._bloom_offset
+        for position in _bloom_positions(digest, self.num_bits, self.num_hashes):
+            if not self._mmap[bloom + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return self._confirm(digest)
+
+    def _confirm(self, digest):
+        """Exact membership by binary search over the sorted digests"""
+        data = self._mmap
+        base = self._digest_offset
+        low, high = 0, self.entries
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + middle * DIGEST_SIZE
+            candidate = data[offset:offset + DIGEST_SIZE]
+            if candidate < digest:
+                low = middle + 1
+            elif candidate > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def matcher(self):
+        return BlocklistMatcher(self)
+
+    def scan(self, text):
+        """Single pass over a message: returns (normalized words, matches)"""
+        matcher = self.matcher()
+        words = [word for word in map(matcher.feed, str(text).split()) if word]
+        return words, matcher.matches
+
+    def close(self):
+        self._mmap.close()
+
+
+class BlocklistMatcher:
+    """
+    Checks the whitespace-separated tokens of one message as they are
+    extracted: URL-like and domain-like tokens against the URL and domain
+    entries, and every run of normalized words against the phrase entries.
+    """
+
+    def __init__(self, blocklist):
+        self.blocklist = blocklist
+        self.matches = []
+        self._words = deque(maxlen=max(blocklist.max_phrase_words, 1))
+
+    def feed(self, token):
+        """Check one raw token; returns its normalized word ('' if none)"""
+        word = normalize_word(token)
+        if len(token) > MAX_TOKEN_LENGTH:
+            self.skip()
+            return word
+
+        if '.' in token or '/' in token:
+            self._check_address(token)
+
+        if word and self.blocklist.max_phrase_words:
+            self._words.append(word)
+            words = list(self._words)
+            for start, first in enumerate(words):
+                if not self.blocklist.is_phrase_start(first):
+                    continue
+                phrase = ' '.join(words[start:])
+                if PHRASE + phrase in self.blocklist:
+                    self.matches.append(PHRASE + phrase)
+        return word
+
+    def skip(self):
+        """An unchecked token breaks phrase adjacency"""
+        self._words.clear()
+
+    def _check_address(self, token):
+        host, key = normalize_url(token)
+        if not _HOST.match(host):
+            return
+        if key != host and URL + key in self.blocklist:
+            self.matches.append(URL + key)
+
+        # example.com also blocks mail.example.com
+        labels = host.split('.')
+        for start in range(len(labels) - 1):
+            domain = '.'.join(labels[start:])
+            if DOMAIN + domain in self.blocklist:
+                self.matches.append(DOMAIN + domain)
+                return
+
+
+def load_blocklist(path):
+    """Open the blocklist at ``path``; None when unset or unavailable"""
+    if not path:
+        return None
+    try:
+        blocklist = Blocklist(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Blocklist disabled, cannot load {path}: {e}")
+        return None
+    logger.info(f"Loaded blocklist {path} with {blocklist.entries} entries")
+    return blocklist
+
+
+def _read_lines(path):
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def _source_keys(domains, urls, phrases):
+    for path in domains:
+        for line in _read_lines(path):
+            yield DOMAIN + normalize_domain(line)
+    for path in urls:
+        for line in _read_lines(path):
+            host, key = normalize_url(line)
+            yield (URL + key) if key != host else (DOMAIN + host)
+    for path in phrases:
+        for line in _read_lines(path):
+            phrase = normalize_text(line)
+            if phrase:
+                yield PHRASE + phrase
+                yield PHRASE_START + phrase.split(' ', 1)[0]
+
+
+def _spill(digests, directory):
+    """Write digests to an anonymous temporary file, rewound for reading"""
+    run = tempfile.TemporaryFile(dir=directory)
+    run.write(b''.join(digests))
+    run.seek(0)
+    return run
+
+
+def _read_digests(f):
+    return iter(partial(f.read, DIGEST_SIZE), b'')
+
+
+def _sorted_runs(digests, directory, chunk_size):
+    runs = []
+    chunk = set()
+    for digest in digests:
+        chunk.add(digest)
+        if len(chunk) >= chunk_size:
+            runs.append(_spill(sorted(chunk), directory))
+            chunk = set()
+    runs.append(_spill(sorted(chunk), directory))
+    return runs
+
+
+def build(output, domains=(), urls=(), phrases=(), fp_rate=0.001, chunk_size=SORT_CHUNK):
+    """
+    Build a blocklist file from text files with one entry per line.
+
+    Digests are sorted externally (runs of ``chunk_size`` spilled to
+    temporary files, then merged), so memory stays bounded by the chunk
+    size and the Bloom filter whatever the size of the feed.
+    """
+    directory = os.path.dirname(os.path.abspath(output))
+    max_phrase_words = 0
+
+    def digests():
+        nonlocal max_phrase_words
+        for key in _source_keys(domains, urls, phrases):
+            if key.startswith(PHRASE):
+                max_phrase_words = max(max_phrase_words, key.count(' ') + 1)
+            yield _digest(key)
+
+    runs = _sorted_runs(digests(), directory, chunk_size)
+    try:
+        # Merge the runs into one sorted, de-duplicated digest table
+        entries = 0
+        with tempfile.TemporaryFile(dir=directory) as table:
+            previous = None
+            for digest in heapq.merge(*map(_read_digests, runs)):
+                if digest != previous:
+                    table.write(digest)
+                    entries += 1
+                    previous = digest
+
+            num_bits = max(64, math.ceil(-entries * math.log(fp_rate) / math.log(2) ** 2))
+            num_hashes = max(1, round(num_bits / max(entries, 1) * math.log(2)))
+            bloom = bytearray((num_bits + 7) // 8)
+            table.seek(0)
+            for digest in _read_digests(table):
+                for position in _bloom_positions(digest, num_bits, num_hashes):
+                    bloom[position >> 3] |= 1 << (position & 7)
+
+            # Write next to the target and rename, so running workers keep their
+            # mapping of the old file until they restart
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(HEADER.pack(MAGIC, num_bits, entries, num_hashes, max_phrase_words, 0))
+                    f.write(bloom)
+                    table.seek(0)
+                    shutil.copyfileobj(table, f)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, output)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+    finally:
+        for run in runs:
+            run.close()
+    return entries, num_bits, num_hashes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or query the spam blocklist file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help='build a blocklist from text files')
+    build_parser.add_argument('-o', '--output', required=True, help='blocklist file to write')
+    build_parser.add_argument('--domains', nargs='*', default=[], help='files of bad domains')
+    build_parser.add_argument('--urls', nargs='*', default=[], help='files of bad URLs')
+    build_parser.add_argument('--phrases', nargs='*', default=[], help='files of bad phrases')
+    build_parser.add_argument('--fp-rate', type=float, default=0.001,
+                              help='Bloom filter false positive rate (default: 0.001)')
+
+    check_parser = commands.add_parser('check', help='list blocklist matches in a message')
+    check_parser.add_argument('path', help='blocklist file')
+    check_parser.add_argument('text', help='message to check')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        entries, num_bits, num_hashes = build(
+            args.output, args.domains, args.urls, args.phrases, args.fp_rate
+        )
+        size = os.path.getsize(args.output)
+        print(f"✅ Wrote {args.output}: {entries} entries, {num_bits} bits x {num_hashes} hashes, {size} bytes")
+        return 0
+
+    _, matches = Blocklist(args.path).scan(args.text)
+    for match in matches:
+        print(match)
+    return 1 if matches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+Pure-Python spam detection engine.
+
+Kept free of web framework imports so it can be served by the FastAPI app
+or imported directly by the Django client for in-process predictions.
+"""
+import os
+import re
+
+from blocklist import load_blocklist
+from text_normalizer import MAX_TOKEN_LENGTH, TRANSLATION_TABLE, normalize_fragment, normalize_text
+
+# Comprehensive spam patterns
+SPAM_PATTERNS = [re.compile(pattern) for pattern in [
+    # Financial spam
+    r'\b(win|won|winner|prize|reward|cash|money|free|bonus)\b',
+    r'\b(million|billion|dollar|euro|pound)\b',
+    r'\b(rich|wealth|fortune|lottery|jackpot)\b',
+
+    # Urgency and pressure
+    r'\b(urgent|immediate|instant|limited|quick|fast)\b',
+    r'\b(act now|click here|buy now|order now)\b',
+    r'\b(discount|offer|deal|sale|clearance)\b',
+
+    # Suspicious claims
+    r'\b(guarantee|guaranteed|promise|risk.free)\b',
+    r'\b(selected|chosen|lucky|exclusive|special)\b',
+    r'\b(100% free|no cost|no fee|no obligation)\b',
+
+    # Technical spam
+    r'\b(account|password|verify|confirm|suspend)\b',
+    r'\b(click|link|website|url|http|www)\b',
+
+    # Emotional manipulation
+    r'\b(congratulation|congrats|amazing|incredible)\b',
+    r'\b(opportunity|chance|offer|limited.time)\b'
+]]
+
+# Special cases - override logic for obvious spam/ham
+OBVIOUS_SPAM_PHRASES = [
+    'win free money', 'congratulations you won', 'you are selected',
+    'claim your prize', 'limited time offer', 'act now before'
+]
+
+OBVIOUS_HAM_PHRASES = [
+    'hello how are you', 'meeting tomorrow', 'thanks for your',
+    'see you later', 'have a good day', 'what time is'
+]
+
+# Characters of cleaned text carried between chunks so that patterns and
+# phrases spanning a chunk boundary are still seen exactly once
+CHUNK_OVERLAP = 64
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Optional memory-mapped threat feed of bad domains, URLs and phrases
+BLOCKLIST = load_blocklist(os.environ.get('ML_BLOCKLIST_PATH'))
+
+def clean_text(text):
+    """Unicode-aware text cleaning (see text_normalizer)"""
+    return normalize_text(text)
+
+def _verdict(spam_score, total_words, spam_phrase, ham_phrase, blocklisted=False):
+    """Turn running spam indicator counts into (is_spam, confidence)"""
+    # Calculate spam probability using sophisticated rules
+    spam_ratio = spam_score / max(total_words, 1)
+
+    # Advanced scoring algorithm
+    if total_words < 3:
+        base_score = 0.1
+    elif total_words > 50:
+        base_score = 0.3  # Long messages are often legitimate
+    else:
+        base_score = 0.2
+
+    # Adjust score based on spam indicators
+    if spam_score >= 4:
+        is_spam = True
+        confidence = min(0.85, base_score + (spam_ratio * 0.8))
+    elif spam_score >= 3:
+        is_spam = True
+        confidence = min(0.75, base_score + (spam_ratio * 0.7))
+    elif spam_score >= 2:
+        is_spam = spam_ratio > 0.25
+        confidence = min(0.65, base_score + (spam_ratio * 0.6))
+    elif spam_score >= 1:
+        is_spam = spam_ratio > 0.3
+        confidence = min(0.55, base_score + (spam_ratio * 0.5))
+    else:
+        is_spam = False
+        # Legitimate messages get higher confidence if they're reasonable length
+        confidence = max(0.6, 0.9 - (total_words / 200))
+
+    if spam_phrase:
+        is_spam = True
+        confidence = max(confidence, 0.95)
+
+    if ham_phrase:
+        is_spam = False
+        confidence = max(confidence, 0.9)
+
+    # Known-bad domains, URLs and phrases from the threat feed win outright
+    if blocklisted:
+        is_spam = True
+        confidence = max(confidence, 0.99)
+
+    return is_spam, round(confidence, 3)
+
+def _split_head(text):
+    """Split raw text into its leading token ('' after whitespace) and the rest"""
+    if not text or text[0].isspace():
+        return '', text
+    head = text.split(None, 1)[0]
+    return head, text[len(head):]
+
+def _split_tail(text):
+    """Split raw text into the rest and its trailing token ('' before whitespace)"""
+    if not text or text[-1].isspace():
+        return text, ''
+    tail = text.rsplit(None, 1)[-1]
+    return text[:len(text) - len(tail)], tail
+
+def detect_spam(text):
+    """
+    Advanced rule-based spam detection
+    No machine learning dependencies - pure Python logic
+    """
+    if not text or not text.strip():
+        return False, 0.1
+
+    if BLOCKLIST:
+        # Words and URLs are extracted and checked in one pass over the text
+        words, matches = BLOCKLIST.scan(text)
+        cleaned_text = ' '.join(words)
+    else:
+        cleaned_text = clean_text(text)
+        words = cleaned_text.split()
+        matches = []
+
+    if not words:
+        return False, 0.1
+
+    # Count spam indicators
+    spam_score = 0
+    for pattern in SPAM_PATTERNS:
+        spam_score += len(pattern.findall(cleaned_text))
+
+    spam_phrase = any(phrase in cleaned_text for phrase in OBVIOUS_SPAM_PHRASES)
+    ham_phrase = any(phrase in cleaned_text for phrase in OBVIOUS_HAM_PHRASES)
+
+    return _verdict(spam_score, len(words), spam_phrase, ham_phrase, bool(matches))
+
+class DocumentScorer:
+    """
+    Incremental version of detect_spam for long documents.
+
+    Raw text is fed in chunks of any size; each chunk is cleaned on its own
+    and only a small overlap of cleaned text is kept between chunks, so
+    memory stays bounded by the chunk size. A partial token at the end of a
+    chunk is carried over to the next one, so every token is normalized
+    whole. Running counts give the same result as detect_spam on the whole
+    text.
+
+    When a blocklist is loaded, the same raw tokens are matched against it.
+
+    With ``early_exit`` the scorer reports ``done`` as soon as the verdict
+    can no longer change: on a blocklist match, or without a blocklist on
+    an obvious ham phrase (which overrides everything after it). The label
+    is then final, but the confidence only reflects the text scanned so far.
+    """
+
+    def __init__(self, early_exit=False):
+        self.early_exit = early_exit
+        self.spam_score = 0
+        self.total_words = 0
+        self.spam_phrase = False
+        self.ham_phrase = False
+        self.chars_scanned = 0
+        self.stopped_early = False
+        self._buffer = ''
+        self._mid_word = False  # buffer starts inside a word cut by an earlier scan
+        self._matcher = BLOCKLIST.matcher() if BLOCKLIST else None
+        self._raw_tail = ''
+        self._oversized = False
+
+    @property
+    def done(self):
+        if not self.early_exit:
+            return False
+        if self._matcher:
+            return bool(self._matcher.matches)
+        return self.ham_phrase
+
+    def feed(self, chunk):
+        """Score another piece of raw text; returns ``done``"""
+        if self.done:
+            return True
+
+        self.chars_scanned += len(chunk)
+        self._consume(chunk)
+
+        if len(self._buffer) > 2 * CHUNK_OVERLAP:
+            # Commit everything up to a word start that leaves enough overlap
+            cut = self._buffer.rfind(' ', 0, len(self._buffer) - CHUNK_OVERLAP) + 1
+            if cut > 0:
+                self._scan(cut)
+            else:
+                # One very long word (e.g. an encoded blob): cut inside it to
+                # stay bounded, and remember that the rest of the word must
+                # not be counted or matched as if it were a new word
+                self._scan(len(self._buffer) - CHUNK_OVERLAP, mid_word=True)
+        return self.done
+
+    def _consume(self, chunk, final=False):
+        """Clean the complete raw tokens of a chunk into the buffer"""
+        text = self._raw_tail + chunk
+        self._raw_tail = ''
+
+        if self._oversized:
+            # Still inside a token too long to be a URL or word worth tracking:
+            # it is passed through without confusables or blocklist checks
+            blob, text = _split_head(text)
+            self._append(blob.translate(TRANSLATION_TABLE))
+            if not text and not final:
+                return
+            self._oversized = False
+
+        tail = ''
+        if not final:
+            text, tail = _split_tail(text)
+            if len(tail) <= MAX_TOKEN_LENGTH:
+                self._raw_tail, tail = tail, ''
+
+        if self._matcher:
+            for token in text.split():
+                self._matcher.feed(token)
+        self._append(normalize_fragment(text))
+
+        if tail:
+            self._oversized = True
+            self._append(tail.translate(TRANSLATION_TABLE))
+            if self._matcher:
+                self._matcher.skip()
+
+    def _append(self, piece):
+        if not self._buffer:
+            piece = piece.lstrip()
+        elif self._buffer.endswith(' ') and piece.startswith(' '):
+            piece = piece[1:]
+        self._buffer += piece
+
+    def _scan(self, cut, mid_word=False):
+        """Count indicators starting before ``cut`` and drop that prefix"""
+        window = self._buffer
+        # After a mid-word cut the buffer keeps the character before the cut
+        # so that \b sees the real previous character, not a string start
+        start = int(self._mid_word)
+        for pattern in SPAM_PATTERNS:
+            for match in pattern.finditer(window, start):
+                if match.start() < cut:
+                    self.spam_score += 1
+
+        # Phrases are plain substring checks; the overlap keeps any phrase
+        # straddling the cut inside the next window as well
+        if not self.spam_phrase:
+            self.spam_phrase = any(phrase in window for phrase in OBVIOUS_SPAM_PHRASES)
+        if not self.ham_phrase:
+            self.ham_phrase = any(phrase in window for phrase in OBVIOUS_HAM_PHRASES)
+
+        # A word is counted where it starts, so not again after a mid-word cut
+        self.total_words += len(window[:cut].split()) - start
+        self._buffer = window[cut - 1:] if mid_word else window[cut:]
+        self._mid_word = mid_word
+
+    def result(self):
+        """Finish scoring and return (is_spam, confidence)"""
+        if not self.done:
+            self._consume('', final=True)
+        # Also after an early exit: the text already read still counts, and
+        # a blocklist hit in it must not end up as an empty (ham) document
+        if self._buffer:
+            self._buffer = self._buffer.rstrip()
+            self._scan(len(self._buffer))
+
+        if not self.total_words:
+            return False, 0.1
+
+        blocklisted = bool(self._matcher and self._matcher.matches)
+        return _verdict(self.spam_score, self.total_words, self.spam_phrase, self.ham_phrase, blocklisted)
+
+def iter_chunks(text, chunk_size=DEFAULT_CHUNK_SIZE):
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+def score_document(chunks, early_exit=False):
+    """Score an iterable of raw text chunks; returns a prediction payload"""
+    scorer = DocumentScorer(early_exit=early_exit)
+    for chunk in chunks:
+        if scorer.feed(chunk):
+            scorer.stopped_early = True
+            break
+    is_spam, confidence = scorer.result()
+    return {
+        "prediction": "spam" if is_spam else "ham",
+        "confidence": confidence,
+        "is_spam": is_spam,
+        "chars_scanned": scorer.chars_scanned,
+        "words": scorer.total_words,
+        "stopped_early": scorer.stopped_early
+    }
+
+def predict(text):
+    """Return a prediction payload in the same shape as the /predict endpoint"""
+    is_spam, confidence = detect_spam(text)
+    return {
+        "prediction": "spam" if is_spam else "ham",
+        "confidence": confidence,
+        "is_spam": is_spam
+    }
+
+def predict_document(text, early_exit=False):
+    """Score a long document in chunks without cleaning it all at once"""
+    return score_document(iter_chunks(text), early_exit=early_exit)
@@ -0,0 +1,262 @@
+"""
+Tests for the ML service. Run from this directory:
+
+    python -m unittest tests
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+import admission
+import app as service
+import blocklist
+import spam_engine
+import text_normalizer
+from text_normalizer import normalize_fragment, normalize_text
+
+
+class AdmissionUnderLoadTests(unittest.TestCase):
+    def setUp(self):
+        controller = service.admission
+        for name, value in (('max_concurrency', 1), ('max_queue', 2), ('batch_queue', 1),
+                            ('queue_timeout', 0.05), ('retry_after', 3)):
+            patcher = mock.patch.object(controller, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        detect_spam = service.detect_spam
+
+        def slow_detect_spam(text):
+            time.sleep(0.2)
+            return detect_spam(text)
+
+        patcher = mock.patch.object(service, 'detect_spam', slow_detect_spam)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _flood(self, requests):
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            predictions = [client.post('/predict', json={'text': 'win free money'})
+                           for _ in range(requests)]
+            flood = asyncio.gather(*predictions)
+            await asyncio.sleep(0.05)
+            # Scoring runs off the event loop, so health checks get through
+            # while the scoring slot is still taken
+            health = await client.get('/health')
+            busy = service.admission.in_flight
+            return await flood, health, busy
+
+    def test_overload_is_shed_with_retry_after(self):
+        responses, health, busy = asyncio.run(self._flood(8))
+
+        statuses = [response.status_code for response in responses]
+        self.assertIn(200, statuses)
+        self.assertIn(503, statuses)
+        for response in responses:
+            if response.status_code == 503:
+                self.assertEqual(response.headers['retry-after'], '3')
+
+        self.assertEqual(health.status_code, 200)
+        self.assertEqual(busy, 1)
+
+        metrics = service.admission.metrics()
+        self.assertGreater(metrics['shed']['interactive'] + metrics['timed_out']['interactive'], 0)
+        self.assertEqual(metrics['in_flight'], 0)
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def test_slot_granted_at_the_deadline_is_not_lost(self):
+        controller = admission.AdmissionController(max_concurrency=1, queue_timeout=0.05)
+
+        async def granted_as_it_times_out(waiter, timeout):
+            # What wait_for does on Python 3.12+ when release() and the
+            # deadline land in the same loop tick
+            controller.release(admission.INTERACTIVE)
+            await asyncio.sleep(0)
+            raise asyncio.TimeoutError
+
+        async def scenario():
+            await controller.acquire(admission.INTERACTIVE)
+            with mock.patch.object(admission.asyncio, 'wait_for', granted_as_it_times_out):
+                await controller.acquire(admission.INTERACTIVE)
+            controller.release(admission.INTERACTIVE)
+
+        asyncio.run(scenario())
+        metrics = controller.metrics()
+        self.assertEqual(metrics['in_flight'], 0)
+        self.assertEqual(metrics['admitted']['interactive'], 2)
+        self.assertEqual(metrics['timed_out']['interactive'], 0)
+
+    def test_batch_work_leaves_a_slot_for_interactive_requests(self):
+        controller = admission.AdmissionController(max_concurrency=3, queue_timeout=0.05)
+
+        async def scenario():
+            for _ in range(2):
+                await controller.acquire(admission.BATCH)
+            # Batch is at its limit even though a slot is free...
+            with self.assertRaises(admission.Overloaded):
+                await controller.acquire(admission.BATCH)
+            # ...which interactive requests still get straight away
+            await controller.acquire(admission.INTERACTIVE)
+            self.assertEqual(controller.running, {'interactive': 1, 'batch': 2})
+
+            # A freed slot goes to a queued interactive request first
+            waiting = asyncio.ensure_future(controller.acquire(admission.INTERACTIVE))
+            queued_batch = asyncio.ensure_future(controller.acquire(admission.BATCH))
+            await asyncio.sleep(0)
+            controller.release(admission.BATCH)
+            await waiting
+            with self.assertRaises(admission.Overloaded):
+                await queued_batch
+            self.assertEqual(controller.running, {'interactive': 2, 'batch': 1})
+
+        asyncio.run(scenario())
+
+
+class NormalizerTests(unittest.TestCase):
+    def test_single_script_text_is_not_transliterated(self):
+        self.assertEqual(normalize_text('Привет, как дела?'), 'привет как дела')
+        self.assertEqual(normalize_text('Καλημέρα κόσμε'), 'καλημερα κοσμε')
+
+    def test_confusables_mapped_in_mixed_tokens_only(self):
+        # Cyrillic е and о inside Latin words, next to a Russian word
+        text = 'Fr\u0435\u0435 m\u043eney сегодня'
+        self.assertEqual(normalize_text(text), 'free money сегодня')
+        self.assertEqual(normalize_fragment(' ' + text + '! '), ' free money сегодня ')
+
+    def test_unseen_code_points_do_not_grow_the_table(self):
+        size = len(text_normalizer.TRANSLATION_TABLE)
+        text = ''.join(map(chr, range(0x20000, 0x30000)))
+        self.assertEqual(normalize_text('\U0001D41F\U0001D42B\U0001D41E\U0001D41E ' + text[:10]), 'free ' + text[:10])
+        normalize_text(text)
+        self.assertEqual(len(text_normalizer.TRANSLATION_TABLE), size)
+
+
+class DocumentScorerTests(unittest.TestCase):
+    WORDS = ['win', 'free', 'money', 'click', 'here', 'meeting', 'tomorrow', 'a', 'in',
+             'claim', 'your', 'prize', 'w', 'z' * 65, 'zz', 'fr\u200bee', 'caf\u00e9',
+             'नमस्ते', 'fr\u0435\u0435', 'монета', '-', '\n']
+
+    def assertMatchesDetectSpam(self, text, chunk_size):
+        result = spam_engine.score_document(spam_engine.iter_chunks(text, chunk_size))
+        is_spam, confidence = spam_engine.detect_spam(text)
+        self.assertEqual((result['is_spam'], result['confidence']), (is_spam, confidence),
+                         f"chunk_size={chunk_size} text={text!r}")
+        self.assertEqual(result['words'], len(spam_engine.clean_text(text).split()))
+
+    def test_long_word_cut_does_not_create_keywords(self):
+        text = 'w' + 'z' * 65 + 'in' + ' a' * 40
+        for chunk_size in range(1, 8):
+            self.assertMatchesDetectSpam(text, chunk_size)
+
+    def test_random_chunking_matches_detect_spam(self):
+        rng = random.Random(2026)
+        for _ in range(500):
+            words = rng.choices(self.WORDS, k=rng.randint(0, 80))
+            separators = rng.choices(['', ' ', '  ', '! '], weights=[1, 6, 1, 1], k=len(words))
+            text = ''.join(word + separator for word, separator in zip(words, separators))
+            self.assertMatchesDetectSpam(text, rng.randint(1, 200))
+
+
+class BlocklistScoringTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        domains = os.path.join(directory.name, 'domains.txt')
+        with open(domains, 'w') as f:
+            f.write('bad.example.com\n')
+        path = os.path.join(directory.name, 'blocklist.bin')
+        blocklist.build(path, domains=[domains])
+
+        loaded = blocklist.Blocklist(path)
+        self.addCleanup(loaded.close)
+        patcher = mock.patch.object(spam_engine, 'BLOCKLIST', loaded)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_document_verdict_matches_detect_spam(self):
+        text = 'Hello, see the notes at bad.example.com before the meeting tomorrow. ' * 20
+        self.assertEqual(spam_engine.detect_spam(text), (True, 0.99))
+
+        for early_exit in (False, True):
+            result = spam_engine.predict_document(text, early_exit=early_exit)
+            self.assertEqual(result['prediction'], 'spam')
+            self.assertGreater(result['words'], 0)
+            if not early_exit:
+                self.assertEqual(result['confidence'], 0.99)
+
+            chunked = spam_engine.score_document(spam_engine.iter_chunks(text, 16), early_exit=early_exit)
+            self.assertTrue(chunked['is_spam'])
+            self.assertEqual(chunked['stopped_early'], early_exit)
+
+
+class BlocklistTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.sources = {}
+        for name, lines in (('domains', ['bad.example.com', 'www.spam.test']),
+                            ('urls', ['https://evil.test/win/', 'http://evil.test/win']),
+                            ('phrases', ['Wire the funds!', 'gift card'])):
+            self.sources[name] = [self.write(name + '.txt', lines)]
+        self.path = os.path.join(self.directory, 'blocklist.bin')
+        self.entries = blocklist.build(self.path, **self.sources)[0]
+        self.blocklist = blocklist.Blocklist(self.path)
+        self.addCleanup(self.blocklist.close)
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def matches(self, text):
+        return self.blocklist.scan(text)[1]
+
+    def test_url_keys(self):
+        self.assertEqual(self.matches('go to HTTPS://www.evil.test/win/ now'), ['u:evil.test/win'])
+        self.assertEqual(self.matches('see http://evil.test/winnings'), [])
+
+    def test_subdomains_match_their_domain(self):
+        self.assertEqual(self.matches('mail from mail.bad.example.com.'), ['d:bad.example.com'])
+        self.assertEqual(self.matches('http://spam.test/anything'), ['d:spam.test'])
+        self.assertEqual(self.matches('notbad.example.com example.com'), [])
+
+    def test_phrases_match_across_punctuation(self):
+        self.assertEqual(self.matches('Please WIRE, the funds... today'), ['p:wire the funds'])
+        self.assertEqual(self.matches('buy a gift-card'), [])
+        self.assertEqual(self.matches('wire all the funds'), [])
+
+    def test_chunked_build_matches_in_memory_build(self):
+        path = os.path.join(self.directory, 'chunked.bin')
+        self.assertEqual(blocklist.build(path, chunk_size=2, **self.sources)[0], self.entries)
+        with open(self.path, 'rb') as expected, open(path, 'rb') as built:
+            self.assertEqual(built.read(), expected.read())
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['blocklist.bin', 'chunked.bin', 'domains.txt', 'phrases.txt', 'urls.txt'])
+
+    def test_cli(self):
+        path = os.path.join(self.directory, 'cli.bin')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = blocklist.main(['build', '-o', path, '--domains', *self.sources['domains'],
+                                   '--phrases', *self.sources['phrases']])
+            self.assertEqual(code, 0)
+            self.assertEqual(blocklist.main(['check', path, 'hi from bad.example.com']), 1)
+            self.assertEqual(blocklist.main(['check', path, 'hello there']), 0)
+        self.assertIn(f'Wrote {path}', output.getvalue())
+        self.assertTrue(output.getvalue().endswith('d:bad.example.com\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
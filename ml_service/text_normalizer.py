@@ -0,0 +1,169 @@
+"""
+Unicode-aware text normalizer.
+
+Everything is folded into one ``str.translate`` table, computed per code
+point: compatibility decomposition (full-width and styled letters,
+ligatures), accent stripping and case folding, while zero-width
+characters, digits, punctuation and symbols are deleted and all
+whitespace becomes a plain space. Normalizing a message is then a single
+translate pass plus whitespace collapsing, and pure ASCII input hits
+CPython's fast ASCII translate path.
+
+Cyrillic and Greek letters that look like Latin ones are only mapped to
+Latin inside tokens that also contain Latin letters ("frее" with a
+Cyrillic е), so genuine Russian or Greek text is left alone. That takes a
+second, per-token pass, but only for text that mixes both.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+# Letters from other scripts that are commonly swapped in for Latin ones
+# to dodge keyword filters. Keys are already case folded. Only applied to
+# tokens that mix them with Latin letters.
+CONFUSABLES = {
+    # Cyrillic
+    'а': 'a', 'в': 'b', 'е': 'e', 'і': 'i', 'ј': 'j', 'к': 'k',
+    'м': 'm', 'н': 'h', 'о': 'o', 'п': 'n', 'р': 'p', 'с': 'c', 'т': 't',
+    'у': 'y', 'х': 'x', 'ѕ': 's', 'ԁ': 'd', 'ԛ': 'q', 'ԝ': 'w', 'ү': 'y',
+    'һ': 'h', 'ӏ': 'l',
+    # Greek
+    'α': 'a', 'β': 'b', 'ε': 'e', 'ζ': 'z', 'ι': 'i', 'κ': 'k', 'μ': 'm',
+    'ν': 'v', 'ο': 'o', 'ρ': 'p', 'τ': 't', 'υ': 'u', 'χ': 'x', 'ϲ': 'c',
+}
+
+# Latin letters without a decomposition that stand in for plain ones.
+# These are always mapped, like accents.
+LATIN_VARIANTS = {
+    'ı': 'i', 'ȷ': 'j', 'ɡ': 'g', 'ɑ': 'a', 'ø': 'o', 'đ': 'd', 'ħ': 'h', 'ł': 'l',
+    'ŧ': 't', 'ƀ': 'b', 'ɨ': 'i', 'ʏ': 'y', 'ᴀ': 'a', 'ʙ': 'b', 'ᴄ': 'c',
+    'ᴅ': 'd', 'ᴇ': 'e', 'ɢ': 'g', 'ʜ': 'h', 'ɪ': 'i', 'ᴊ': 'j', 'ᴋ': 'k',
+    'ʟ': 'l', 'ᴍ': 'm', 'ɴ': 'n', 'ᴏ': 'o', 'ᴘ': 'p', 'ʀ': 'r', 'ꜱ': 's',
+    'ᴛ': 't', 'ᴜ': 'u', 'ᴠ': 'v', 'ᴡ': 'w', 'ᴢ': 'z',
+}
+
+# Tokens longer than this (encoded blobs) are opaque: confusables are not
+# mapped in them and the blocklist does not check them, so streamed
+# documents never have to buffer more than this of a partial token
+MAX_TOKEN_LENGTH = 4096
+
+# Invisible characters used to split keywords ("fr\u200bee"). Most are not
+# letters and would be deleted anyway, but the Hangul fillers are.
+ZERO_WIDTH = (
+    '\u00ad\u034f\u061c\u115f\u1160\u17b4\u17b5\u180e'
+    '\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff'
+)
+
+# Generic combining diacritic blocks (accents); script-specific marks such as
+# Devanagari vowel signs are kept so those words are not mangled.
+_DIACRITIC_RANGES = (
+    (0x0300, 0x036F),
+    (0x1AB0, 0x1AFF),
+    (0x1DC0, 0x1DFF),
+    (0x20D0, 0x20FF),
+    (0xFE20, 0xFE2F),
+)
+
+# Code points whose mapping is computed eagerly at import; anything else
+# (rare scripts, astral planes such as emoji or math letters) is computed
+# on first sight and kept in a bounded cache, so input cannot grow memory.
+_EAGER_RANGES = (
+    (0x0000, 0x2FFF),
+    (0xFB00, 0xFB4F),
+    (0xFE00, 0xFFFF),
+    (0x1D400, 0x1D7FF),  # mathematical alphanumerics, popular for styled spam
+)
+
+_SPACES = re.compile(r' {2,}')
+_LATIN = re.compile('[a-z]')
+_CONFUSABLE = re.compile('[' + ''.join(CONFUSABLES) + ']')
+
+
+def _is_diacritic(char):
+    code = ord(char)
+    return any(start <= code <= end for start, end in _DIACRITIC_RANGES)
+
+
+def _fold(char):
+    """Normalized replacement for a single character (None deletes it)"""
+    if char.isspace():
+        return ' '
+    if char in ZERO_WIDTH:
+        return None
+
+    folded = []
+    for part in unicodedata.normalize('NFKD', char):
+        for lower in part.casefold():
+            if _is_diacritic(lower):
+                continue
+            lower = LATIN_VARIANTS.get(lower, lower)
+            if lower.isalpha() or unicodedata.category(lower) in ('Mn', 'Mc'):
+                folded.append(lower)
+    # None rather than '' for deletions keeps CPython on its ASCII fast path
+    return ''.join(folded) or None
+
+
+@lru_cache(maxsize=16384)
+def _fold_rare(code):
+    return _fold(chr(code))
+
+
+class _TranslationTable(dict):
+    """str.translate table that looks up code points outside the eager ranges lazily"""
+
+    def __missing__(self, code):
+        return _fold_rare(code)
+
+
+def _build_table():
+    table = _TranslationTable()
+    for start, end in _EAGER_RANGES:
+        for code in range(start, end + 1):
+            table[code] = _fold(chr(code))
+    # Identity entries are kept: a hit is cheaper than __missing__
+    return table
+
+
+TRANSLATION_TABLE = _build_table()
+CONFUSABLES_TABLE = str.maketrans(CONFUSABLES)
+
+
+def _may_mix(folded):
+    """Cheap check whether any token of translated text can mix scripts"""
+    return not folded.isascii() and bool(_CONFUSABLE.search(folded)) and bool(_LATIN.search(folded))
+
+
+def normalize_word(token):
+    """Normalize one whitespace-free token, mapping confusables if it mixes scripts"""
+    word = token.translate(TRANSLATION_TABLE)
+    if len(token) <= MAX_TOKEN_LENGTH and _may_mix(word):
+        word = word.translate(CONFUSABLES_TABLE)
+    return word
+
+
+def _normalize_words(text):
+    return ' '.join(filter(None, map(normalize_word, text.split())))
+
+
+def normalize_fragment(text):
+    """
+    Normalize a piece of a larger text: translate and collapse runs of
+    spaces, but keep a single leading/trailing space so fragments can be
+    joined without merging words. Confusables are judged per token, so the
+    fragment should not cut through one.
+    """
+    folded = text.translate(TRANSLATION_TABLE)
+    if not _may_mix(folded):
+        return _SPACES.sub(' ', folded)
+    lead = ' ' if folded.startswith(' ') else ''
+    trail = ' ' if folded.endswith(' ') else ''
+    return lead + _normalize_words(text) + trail
+
+
+def normalize_text(text):
+    """Case fold, strip accents, zero-width characters and non-letters, map homoglyphs"""
+    text = str(text)
+    folded = text.translate(TRANSLATION_TABLE)
+    if not _may_mix(folded):
+        return ' '.join(folded.split())
+    return _normalize_words(text)